@@ -8,11 +8,15 @@ import subprocess
 import json
 import pprint
 import csv
+import zlib
 from datetime import datetime, timedelta
+from functools import lru_cache
+from types import MappingProxyType
 
 from lib.parallel import *
 
-import gpytorch, torch, botorch, sobol_seq, pandas
+import gpytorch, torch, botorch, pandas
+from torch.quasirandom import SobolEngine
 from botorch import fit_gpytorch_model
 from botorch.models import SingleTaskGP, FixedNoiseGP, ModelListGP, HeteroskedasticSingleTaskGP, FixedNoiseMultiTaskGP
 from gpytorch.mlls.sum_marginal_log_likelihood import SumMarginalLogLikelihood
@@ -246,7 +250,8 @@ def save_state(obj, filename):
 def load_state(filename):
     """Loads obj from `filename`"""
     with open(filename, 'rb') as fp:
-        obj = torch.load(fp)
+        # states written on a GPU machine should load anywhere
+        obj = torch.load(fp, map_location='cpu')
     return obj
 
 def pdict_to_parr(*, pdict, multi_beta_calibration, estimate_mobility_reduction):
@@ -299,16 +304,21 @@ def parr_to_pdict(*, parr, multi_beta_calibration, estimate_mobility_reduction):
     return pdict
 
 
+@lru_cache(maxsize=None)
 def get_calibrated_params(*, country, area, multi_beta_calibration=False, estimate_mobility_reduction=False, maxiters=None):
     """
     Returns calibrated parameters for a `country` and an `area`
+
+    Memoized, so experiment scripts sweeping e.g. compliance levels only
+    unpickle the calibration state once; the result is returned as a
+    read-only mapping to protect the cache entry.
     """
 
     if maxiters:
         param_dict = get_calibrated_params_limited_iters(
             country, area, multi_beta_calibration=multi_beta_calibration,
             estimate_mobility_reduction=estimate_mobility_reduction, maxiters=maxiters)
-        return param_dict
+        return MappingProxyType(param_dict)
 
     state = load_state(calibration_states[country][area])
     theta = state['train_theta']
@@ -329,12 +339,15 @@ def get_calibrated_params(*, country, area, multi_beta_calibration=False, estima
     params = transforms.unnormalize(norm_params, sim_bounds)
     param_dict = parr_to_pdict(parr=params, multi_beta_calibration=multi_beta_calibration,
                                estimate_mobility_reduction=estimate_mobility_reduction)
-    return param_dict
+    return MappingProxyType(param_dict)
 
 
+@lru_cache(maxsize=None)
 def get_calibrated_params_from_path(path, estimate_mobility_reduction=False, multi_beta_calibration=False):
     """
-    Returns calibrated parameters for a `country` and an `area`
+    Returns calibrated parameters from the calibration state at `path`
+
+    Memoized like `get_calibrated_params`; returns a read-only mapping.
     """
 
     state = load_state(path)
@@ -356,7 +369,7 @@ def get_calibrated_params_from_path(path, estimate_mobility_reduction=False, mul
     params = transforms.unnormalize(norm_params, sim_bounds)
     param_dict = parr_to_pdict(parr=params, multi_beta_calibration=False,
                                estimate_mobility_reduction=estimate_mobility_reduction)
-    return param_dict
+    return MappingProxyType(param_dict)
 
 
 def get_unique_calibration_params(*, country, area, multi_beta_calibration, estimate_mobility_reduction, maxiters=None):
@@ -607,6 +620,11 @@ def make_bayes_opt_functions(args):
     multi_beta_calibration = args.multi_beta_calibration
     estimate_mobility_reduction = args.estimate_mobility_reduction
 
+    # device on which GP fitting and acquisition optimization are performed;
+    # the GP hot path (kernel evaluation, Cholesky) is dense linear algebra
+    # and benefits from a GPU, while simulation rollouts stay on CPU workers
+    device = torch.device(getattr(args, 'device', None) or 'cpu')
+
     if multi_beta_calibration:
         param_bounds = calibration_model_param_bounds_multi
     else:
@@ -783,6 +801,11 @@ def make_bayes_opt_functions(args):
         G_obs = G_obs / G_obs_reference
         G_obs_aggregate = G_obs_aggregate / G_obs_reference
 
+    # targets on the BO device, used inside the objective (the CPU copies
+    # above remain in use for the simulation post-processing)
+    G_obs_device = G_obs.to(device)
+    G_obs_aggregate_device = G_obs_aggregate.to(device)
+
     '''
     Objective function
     Note: in BO and botorch, objectives are maximized
@@ -794,11 +817,11 @@ def make_bayes_opt_functions(args):
         # objective /on top of/ black box vector-valued simulator
         if per_age_group_objective:
             def composite_squared_loss(G):
-                return - (G - G_obs).pow(2).sum(dim=-1) / n_days
+                return - (G - G_obs_device).pow(2).sum(dim=-1) / n_days
 
         else:
             def composite_squared_loss(G):
-                return - (G - G_obs_aggregate).pow(2).sum(dim=-1) / n_days
+                return - (G - G_obs_aggregate_device).pow(2).sum(dim=-1) / n_days
 
         # select objective function
         if args.log_objective:
@@ -824,7 +847,7 @@ def make_bayes_opt_functions(args):
         '''
         Computes unnormalized parameters
         '''
-        return transforms.unnormalize(theta, sim_bounds)
+        return transforms.unnormalize(theta.detach().cpu(), sim_bounds)
 
     def composite_simulation(norm_params, iter_idx):
         """
@@ -834,7 +857,8 @@ def make_bayes_opt_functions(args):
         """
 
         # un-normalize normalized params to obtain simulation parameters
-        params = transforms.unnormalize(norm_params, sim_bounds)
+        # (params proposed on the BO device are consumed on CPU)
+        params = transforms.unnormalize(norm_params.detach().cpu(), sim_bounds)
 
         # finalize model parameters based on given parameters and calibration mode
         kwargs = copy.deepcopy(launch_kwargs)        
@@ -985,8 +1009,9 @@ def make_bayes_opt_functions(args):
             G = G.reshape(n_days * n_age)
             G_sem = G_sem.reshape(n_days * n_age)
 
-        G = G.float()
-        G_sem = G_sem.float()
+        # move observations to the BO device for model fitting
+        G = G.float().to(device)
+        G_sem = G_sem.float().to(device)
 
         return G, G_sem, case_diff_last_day
 
@@ -1003,10 +1028,13 @@ def make_bayes_opt_functions(args):
             raise ValueError(
                 'qKnowledgeGradient and GP needs at least one observation to be defined properly.')
 
-        # sobol sequence proposal points
+        # scrambled Sobol sequence proposal points; scrambling improves the
+        # uniformity of short sequences, and seeding it from `args.seed` keeps
+        # the sequence reproducible so interrupted runs can be resumed
         # new_thetas: [n, n_params]
-        new_thetas = torch.tensor(
-            sobol_seq.i4_sobol_generate(n_params, n), dtype=torch.float)
+        sobol_seed = int(args.seed) if args.seed.isdigit() else zlib.crc32(args.seed.encode())
+        new_thetas = SobolEngine(dimension=n_params, scramble=True,
+                                 seed=sobol_seed).draw(n).float()
 
         if args.init_explore_corner_settings:
 
@@ -1049,20 +1077,20 @@ def make_bayes_opt_functions(args):
             n_loaded_init = 0  # loaded no. of quasi-random initialization observations
             n_init = n         # final no. of observations returned, at least quasi-random initializations
 
-        # instantiate simulator observation tensors
+        # instantiate simulator observation tensors on the BO device
         if args.model_multi_output_simulator:
             if per_age_group_objective:
                 # new_G, new_G_sem: [n_init, n_days * n_age] (flattened outputs)
-                new_G =     torch.zeros((n_init, n_days * n_age), dtype=torch.float)
-                new_G_sem = torch.zeros((n_init, n_days * n_age), dtype=torch.float)
+                new_G =     torch.zeros((n_init, n_days * n_age), dtype=torch.float, device=device)
+                new_G_sem = torch.zeros((n_init, n_days * n_age), dtype=torch.float, device=device)
             else:
                 # new_G, new_G_sem: [n_init, n_days]
-                new_G =     torch.zeros((n_init, n_days), dtype=torch.float)
-                new_G_sem = torch.zeros((n_init, n_days), dtype=torch.float)
+                new_G =     torch.zeros((n_init, n_days), dtype=torch.float, device=device)
+                new_G_sem = torch.zeros((n_init, n_days), dtype=torch.float, device=device)
         else:
             # new_G, new_G_sem:     [n_init, 1]
-            new_G =     torch.zeros((n_init, 1), dtype=torch.float)
-            new_G_sem = torch.zeros((n_init, 1), dtype=torch.float)
+            new_G =     torch.zeros((n_init, 1), dtype=torch.float, device=device)
+            new_G_sem = torch.zeros((n_init, 1), dtype=torch.float, device=device)
 
         # generate `n` initial evaluations at quasi random settings; if applicable, skip and load expensive evaluation result
         for i in range(n_init):
@@ -1070,7 +1098,7 @@ def make_bayes_opt_functions(args):
             # if loaded, use initial observation for this parameter settings
             if loaded and i <= n_loaded - 1:
                 new_thetas[i] = loaded_init_theta[i]
-                G, G_sem = loaded_init_G[i], loaded_init_G_sem[i]
+                G, G_sem = loaded_init_G[i].to(device), loaded_init_G_sem[i].to(device)
                 case_diff_last_day = None # currently not saved
                 walltime = 0.0
 
@@ -1113,7 +1141,7 @@ def make_bayes_opt_functions(args):
         best_f_idx = f.argmax()
         best_f = f[best_f_idx].item()
 
-        return new_thetas, new_G, new_G_sem, best_f, best_f_idx
+        return new_thetas.to(device), new_G, new_G_sem, best_f, best_f_idx
 
     def initialize_model(train_x, train_y, train_y_sem):
         """
@@ -1148,7 +1176,7 @@ def make_bayes_opt_functions(args):
 
     # Model initialization
     # parameters used in BO are always in unit cube for optimal hyperparameter tuning of GPs
-    bo_bounds = torch.stack([torch.zeros(n_params), torch.ones(n_params)])
+    bo_bounds = torch.stack([torch.zeros(n_params), torch.ones(n_params)]).to(device)
 
     def optimize_acqf_and_get_observation(acq_func, args, iter_idx):
         """
@@ -16,6 +16,18 @@ def make_calibration_parser():
     parser.add_argument("--plot-fit", action="store_true", help="plots model fit at each improvement and stores inside `logs/`")
 
     # BO
+    parser.add_argument("--device",
+        help="set device for GP fitting and acquisition optimization, e.g. 'cuda' or 'cpu'; "
+             "defaults to 'cuda' when available")
+    parser.add_argument("--fully-bayesian", action="store_true",
+        help="fit a fully Bayesian (SAAS) GP with NUTS instead of the MLL-II fit; "
+             "requires botorch >= 0.7 (NumPyro-backed NUTS)")
+    parser.add_argument("--fb_nuts_warmup", type=int, default=256,
+        help="update default number of NUTS warmup steps (only with --fully-bayesian)")
+    parser.add_argument("--fb_nuts_samples", type=int, default=128,
+        help="update default number of NUTS samples (only with --fully-bayesian)")
+    parser.add_argument("--fb_nuts_thinning", type=int, default=16,
+        help="update default NUTS thinning factor (only with --fully-bayesian)")
     parser.add_argument("--ninit", type=int, default=calibration_simulation['n_init_samples'],
         help="update default number of quasi-random initial evaluations")
     parser.add_argument("--niters", type=int, default=calibration_simulation['n_iterations'],
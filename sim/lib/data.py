@@ -1,43 +1,92 @@
 import sys
-import argparse
 if '..' not in sys.path:
     sys.path.append('..')
 
-import time
-import bisect
 import numpy as np
 import pandas as pd
-import networkx as nx
-import scipy
-import scipy.optimize
-import scipy as sp
 import os
-import matplotlib.pyplot as plt
-import random
+from functools import lru_cache
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
 
 TO_HOURS = 24.0
 
 from lib.calibrationSettings import command_line_area_codes
 
+GER_CASES_PATH = 'lib/data/cases/GER_COVID19.csv'
+CH_CASES_PATH = 'lib/data/cases/CH_COVID19.csv'
 
-def get_preprocessed_data_germany(landkreis='LK Tübingen', start_date_string='2020-03-10', until=None, end_date_string=None):
-    '''
-    Preprocesses data for a specific Landkreis in Germany
-    Data taken from
-    https://npgeo-corona-npgeo-de.hub.arcgis.com/datasets/dd4580c810204019a7b8eb3e0b329dd6_0?orderBy=Bundesland
+# reference date of the `days_epoch` column stored in the cached case data
+CASES_EPOCH = pd.Timestamp('2020-01-01')
 
-    List of Landkreis districts in `data_availability_GER.md`
 
+def _load_cases_cached(path, read_csv_fn, filters=None):
+    '''
+    Loads the national case file at `path`, caching the parsed and normalized
+    DataFrame produced by `read_csv_fn` as a Parquet snapshot next to the CSV.
+    The snapshot is keyed by the CSV modification time, so updating the CSV
+    invalidates it. `filters` (pyarrow predicate format) are pushed down into
+    the Parquet read so only the relevant rows are materialized.
     '''
+    cache_path = path + '.parquet'
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        df = pd.read_parquet(cache_path, filters=filters)
+        if 'days_epoch' in df.columns: # rebuild snapshots from before the epoch-days schema
+            return df
+
+    df = read_csv_fn(path)
+    try:
+        df.to_parquet(cache_path)
+    except (ImportError, OSError):
+        # no parquet engine installed or cases directory not writable;
+        # fall back to parsing the CSV on every call
+        pass
+    return df
 
-    # preprocessing
-    df = pd.read_csv('lib/data/cases/GER_COVID19.csv', header=0, delimiter=',')
-    # print('Data last updated at: ', df.Datenstand.unique()[0])
 
-    # delete unnecessary
-    df = df[df['Landkreis'] == landkreis]
-    df.drop(['Datenstand', 'IdLandkreis', 'Refdatum', 
-            'Landkreis', 'IdBundesland', 'Bundesland', 'Geschlecht'], axis=1, inplace=True)
+def _read_cases_csv_germany(path):
+    '''
+    Parses and normalizes the national German case CSV (all Landkreis districts)
+    '''
+    # only parse the columns used downstream, with explicit dtypes; the
+    # dictionary-encoded (category) Landkreis makes the district filter a
+    # single int compare per row instead of a Python string compare
+    usecols = ['Landkreis', 'Altersgruppe', 'Meldedatum',
+               'AnzahlFall', 'NeuerFall',
+               'AnzahlGenesen', 'NeuGenesen',
+               'AnzahlTodesfall', 'NeuerTodesfall']
+
+    if pa is not None:
+        # arrow's multithreaded CSV reader; dictionary-encoded string columns
+        # come back as pandas categories
+        tbl = pa_csv.read_csv(path, convert_options=pa_csv.ConvertOptions(
+            include_columns=usecols,
+            column_types={'Landkreis': pa.dictionary(pa.int32(), pa.string()),
+                          'Altersgruppe': pa.dictionary(pa.int32(), pa.string()),
+                          'NeuerFall': pa.int8(), 'NeuGenesen': pa.int8(),
+                          'NeuerTodesfall': pa.int8(),
+                          'AnzahlFall': pa.int32(), 'AnzahlGenesen': pa.int32(),
+                          'AnzahlTodesfall': pa.int32(),
+                          'Meldedatum': pa.timestamp('s')},
+            timestamp_parsers=['%Y/%m/%d %H:%M:%S']))
+        df = tbl.to_pandas(self_destruct=True)
+    else:
+        df = pd.read_csv(
+            path, header=0, delimiter=',',
+            usecols=usecols,
+            dtype={'Landkreis': 'category', 'Altersgruppe': 'category',
+                   'NeuerFall': 'int8', 'NeuGenesen': 'int8', 'NeuerTodesfall': 'int8',
+                   'AnzahlFall': 'int32', 'AnzahlGenesen': 'int32', 'AnzahlTodesfall': 'int32'},
+            parse_dates=['Meldedatum'])
 
     # delete weird data rows (insignificant)
     df = df[df.Altersgruppe != 'unbekannt'] # this is just 1 row
@@ -51,44 +100,46 @@ def get_preprocessed_data_germany(landkreis='LK Tübingen', start_date_string='2
         'A60-A79' : 4,
         'A80+' : 5,
     }
-    df['age_group'] = 0
-    for k,v in agemap.items():
-        df.loc[df.Altersgruppe == k, 'age_group'] = v
+    df['age_group'] = df['Altersgruppe'].map(agemap).astype(np.int8)
     df.drop(['Altersgruppe'], axis=1, inplace=True)
 
-    # process date to a number of days until start of actual case growth
-    df.Meldedatum = pd.to_datetime(df.Meldedatum)
-    start_date = pd.to_datetime(start_date_string)
-    df['days'] = (df.Meldedatum - start_date).dt.days
-
-    # filter days
-    if until:
-        df = df[df['days'] <= until]
-
-    if end_date_string:
-        df = df[df['Meldedatum'] <= pd.to_datetime(end_date_string)]
-
+    # store the report date as integer days since `CASES_EPOCH`; int16 is ample
+    # and avoids re-parsing datetimes on every (cached) load
+    df['days_epoch'] = (df['Meldedatum'] - CASES_EPOCH).dt.days.astype(np.int16)
+    df.drop(['Meldedatum'], axis=1, inplace=True)
     return df
 
 
-def get_preprocessed_data_switzerland(canton='ZH', start_date_string='2020-03-10', until=None, end_date_string=None):
+def _read_cases_csv_switzerland(path):
     '''
-    Preprocesses data for a specific Canton district in Switzerland
-    Data taken from
-    https://covid-19-schweiz.bagapps.ch/de-1.html
-
-    List of Cantons districts in `data_availability_CH.md`
-
+    Parses and normalizes the national Swiss case CSV (all Canton districts)
     '''
+    usecols = ['Canton', 'Altersklasse', 'Datum', 'Anzahl laborbestätigte Fälle']
+
+    # the national file ships as UTF-16, which forces pandas' slow Python
+    # engine; transcode it once to a UTF-8 sidecar (keyed by the CSV
+    # modification time, like the Parquet snapshot) so parsing uses the C
+    # engine and only materializes the needed columns
+    utf8_path = path + '.utf8'
+    try:
+        if not (os.path.exists(utf8_path)
+                and os.path.getmtime(utf8_path) >= os.path.getmtime(path)):
+            with open(path, 'r', encoding='utf-16') as src:
+                with open(utf8_path, 'w', encoding='utf-8') as dst:
+                    dst.write(src.read())
+    except OSError:
+        # cases directory not writable; decode the UTF-16 original every call
+        utf8_path = None
+
+    if utf8_path is not None:
+        df = pd.read_csv(utf8_path, header=0, delimiter='\t', encoding='utf-8',
+                         usecols=usecols,
+                         dtype={'Canton': 'category', 'Altersklasse': 'category'})
+    else:
+        df = pd.read_csv(path, header=0, delimiter='\t', encoding='utf-16')
 
-    # preprocessing
-    df = pd.read_csv('lib/data/cases/CH_COVID19.csv',
-                     header=0, delimiter='\t', encoding='utf-16')
-    # print('Data last updated at: ', df.Datenstand.unique()[0])
-
-    # delete unnecessary
-    df = df[df['Canton'] == canton]
-    df = df[['Canton', 'Altersklasse', 'Datum', 'Anzahl laborbestätigte Fälle']]
+        # delete unnecessary
+        df = df[usecols]
 
     # Altersgruppe map
     agemap = {
@@ -102,43 +153,147 @@ def get_preprocessed_data_switzerland(canton='ZH', start_date_string='2020-03-10
         '70 - 79 Jahren': 7,
         '80+ Jahren': 8,
     }
-    df['age_group'] = 0
-    for k, v in agemap.items():
-        df.loc[df.Altersklasse == k, 'age_group'] = v
+    df['age_group'] = df['Altersklasse'].map(agemap).astype(np.int8)
     df.drop(['Altersklasse'], axis=1, inplace=True)
 
-    # process date to a number of days until start of actual case growth
     df['Datum'] = pd.to_datetime(
         df['Datum'], format='%d.%m.%Y')
-    # only 4 cases in 2 weeks before that
-    start_date = pd.to_datetime(start_date_string)
-    df['days'] = ((df['Datum'] - start_date).dt.days)
-    df = df[df['days'].notna()] # drop nan dates
-    df.days = df.days.astype(int) # 
+    df = df[df['Datum'].notna()] # drop nan dates
+
+    # store the report date as integer days since `CASES_EPOCH`; int16 is ample
+    # and avoids re-parsing datetimes on every (cached) load
+    df['days_epoch'] = (df['Datum'] - CASES_EPOCH).dt.days.astype(np.int16)
+    df.drop(['Datum'], axis=1, inplace=True)
 
     # rename into nicer column name
     df['new'] = df['Anzahl laborbestätigte Fälle']
     df.drop(['Anzahl laborbestätigte Fälle'], axis=1, inplace=True)
+    return df
+
+
+def get_preprocessed_data_germany(landkreis='LK Tübingen', start_date_string='2020-03-10', until=None, end_date_string=None):
+    '''
+    Preprocesses data for a specific Landkreis in Germany
+    Data taken from
+    https://npgeo-corona-npgeo-de.hub.arcgis.com/datasets/dd4580c810204019a7b8eb3e0b329dd6_0?orderBy=Bundesland
+
+    List of Landkreis districts in `data_availability_GER.md`
+
+    '''
+
+    # preprocessing (cached across calls; predicate pushed down into Parquet read)
+    df = _load_cases_cached(GER_CASES_PATH, _read_cases_csv_germany,
+                            filters=[('Landkreis', '=', landkreis)])
+
+    # delete unnecessary (no-op after pushdown, needed on the CSV fallback path)
+    df = df[df['Landkreis'] == landkreis]
+    df = df.drop(['Landkreis'], axis=1)
+
+    # process date to a number of days until start of actual case growth;
+    # pure integer arithmetic on the stored epoch days, no datetime temporaries
+    start_date = pd.to_datetime(start_date_string)
+    df['days'] = df['days_epoch'] - (start_date - CASES_EPOCH).days
+
+    # filter days
+    if until:
+        df = df[df['days'] <= until]
+
+    if end_date_string:
+        df = df[df['days'] <= (pd.to_datetime(end_date_string) - start_date).days]
+
+    return df
+
+
+def get_preprocessed_data_switzerland(canton='ZH', start_date_string='2020-03-10', until=None, end_date_string=None):
+    '''
+    Preprocesses data for a specific Canton district in Switzerland
+    Data taken from
+    https://covid-19-schweiz.bagapps.ch/de-1.html
+
+    List of Cantons districts in `data_availability_CH.md`
+
+    '''
+
+    # preprocessing (cached across calls; predicate pushed down into Parquet read)
+    df = _load_cases_cached(CH_CASES_PATH, _read_cases_csv_switzerland,
+                            filters=[('Canton', '=', canton)])
+
+    # delete unnecessary (no-op after pushdown, needed on the CSV fallback path)
+    df = df[df['Canton'] == canton]
+
+    # process date to a number of days until start of actual case growth;
+    # only 4 cases in 2 weeks before that
+    start_date = pd.to_datetime(start_date_string)
+    df['days'] = df['days_epoch'] - (start_date - CASES_EPOCH).days
 
     # filter days
     if until:
         df = df[df['days'] <= until]
 
     if end_date_string:
-        df = df[df['Datum']
-                <= pd.to_datetime(end_date_string)]
+        df = df[df['days'] <= (pd.to_datetime(end_date_string) - start_date).days]
 
     return df
 
 
+if njit is not None:
+
+    @njit(cache=True)
+    def _cumulate_njit(days, age_group, new, max_days, num_age_groups):
+        # int32 is ample for per-district cumulative counts and halves the
+        # bytes shipped to every calibration worker
+        out = np.zeros((max_days, num_age_groups), dtype=np.int32)
+        # single O(N) scatter pass over the case rows
+        for i in range(days.size):
+            d = days[i]
+            if d < 0:
+                d = 0 # cases before day 0 count towards the level at day 0
+            if d < max_days:
+                out[d, age_group[i]] += new[i]
+        # prefix sum over days
+        for t in range(1, max_days):
+            for a in range(num_age_groups):
+                out[t, a] += out[t - 1, a]
+        return out
+
+
+def _cumulative_daily_case_counts(df_tmp, max_days, num_age_groups):
+    '''
+    Aggregates the `new` column of `df_tmp` into a cumulative case count array
+    (int32) of shape (`max_days`, `num_age_groups`), i.e. entry (t, a) contains all cases of
+    age group a reported up to and including day t. Cases reported before day 0
+    count towards the level at day 0.
+
+    Uses a compiled single-pass cumulation when numba is installed, and falls
+    back to an equivalent pandas groupby otherwise.
+    '''
+    if njit is not None:
+        return _cumulate_njit(
+            df_tmp['days'].to_numpy(np.int64),
+            df_tmp['age_group'].to_numpy(np.int64),
+            df_tmp['new'].fillna(0).to_numpy(np.int32),
+            max_days, num_age_groups)
+
+    daily = (df_tmp.assign(days=df_tmp['days'].clip(lower=0))
+             .groupby(['days', 'age_group'])['new'].sum()
+             .unstack('age_group', fill_value=0)
+             .reindex(index=np.arange(max_days), columns=np.arange(num_age_groups), fill_value=0))
+    return daily.to_numpy(dtype=np.int32).cumsum(axis=0, dtype=np.int32)
+
+
+@lru_cache(maxsize=32)
 def collect_data_from_df(country, area, datatype, start_date_string, until=None, end_date_string=None):
     '''
-    Collects data for a country `country` and a specific area `area` 
-    either: new, recovered, fatality cases from df 
+    Collects data for a country `country` and a specific area `area`
+    either: new, recovered, fatality cases from df
 
     `datatype` has to be one of `new`, `recovered`, `fatality`
 
     Returns np.array of shape (`max_days`, age_groups)
+
+    Results are memoized across calls (the inputs are invariant over a whole
+    calibration run) and hence returned read-only; callers that need to mutate
+    the counts should copy via `np.array(...)` first.
     '''
     if until and end_date_string:
         print('Can only specify `until` (days until end) or `end_date_string` (end date). ')
@@ -172,23 +327,21 @@ def collect_data_from_df(country, area, datatype, start_date_string, until=None,
             landkreis=landkreis, start_date_string=start_date_string, until=until, end_date_string=end_date_string)
 
         # check whether the new case counts, i.e. wasn't used in a different publication
-        counts_as_new = np.array((df_tmp[indic] == 0) | (df_tmp[indic] == 1), dtype='int')
+        counts_as_new = df_tmp[indic].isin((0, 1)).to_numpy(dtype='int')
 
-        df_tmp['new'] = counts_as_new * df_tmp[ctr]
+        df_tmp['new'] = counts_as_new * df_tmp[ctr].to_numpy()
 
-        # count up each day and them make cumulative
-        data = np.zeros((max_days, 6))  # value, agegroup
-        for t in range(max_days):
-            for agegroup in range(6):
-                data[t, agegroup] += df_tmp[
-                    (df_tmp.days <= t) & (df_tmp.age_group == agegroup)].new.sum()
-                           
-        return data.astype(int)
+        # count up each day and then make cumulative
+        data = _cumulative_daily_case_counts(df_tmp, max_days, 6)
+        data.setflags(write=False) # cached across calls
+        return data
 
     elif country == 'CH':
 
         if datatype != 'new':
-            return np.zeros([1, 9])
+            data = np.zeros([1, 9])
+            data.setflags(write=False) # cached across calls
+            return data
             # raise ValueError('Invalid datatype requested.')
 
         if area in command_line_area_codes['CH'].keys():
@@ -199,14 +352,10 @@ def collect_data_from_df(country, area, datatype, start_date_string, until=None,
         df_tmp = get_preprocessed_data_switzerland(canton=canton, start_date_string=start_date_string, 
                                                    until=until, end_date_string=end_date_string)
 
-        # count up each day and them make cumulative
-        data = np.zeros((max_days, 9))  # value, agegroup
-        for t in range(max_days):
-            for agegroup in range(9):
-                age_group_at_t = (df_tmp.days <= t) & (df_tmp.age_group == agegroup)
-                data[t, agegroup] += df_tmp[age_group_at_t].new.sum()
-            
-        return data.astype(int)
+        # count up each day and then make cumulative
+        data = _cumulative_daily_case_counts(df_tmp, max_days, 9)
+        data.setflags(write=False) # cached across calls
+        return data
 
     else:
         raise NotImplementedError('Invalid country requested.')
@@ -4,6 +4,7 @@ if '..' not in sys.path:
 
 import subprocess
 import pickle, multiprocessing, copy
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 from collections import namedtuple, defaultdict
@@ -17,6 +18,7 @@ from lib.parallel import launch_parallel_simulations
 from lib.distributions import CovidDistributions
 from lib.data import collect_data_from_df
 from lib.measures import *
+from lib.measures_soa import MeasureBundle
 from lib.calibrationSettings import (
     calibration_lockdown_dates, 
     calibration_states,
@@ -59,8 +61,9 @@ Simulation = namedtuple('Simulation', (
     'num_age_groups',           # Number of age groups
     'beacon_config',            # dictionary containing information regarding beacon implementation
     'thresholds_roc',           # threshold values for ROC curve computation
+    'measure_bundle',           # struct-of-arrays view of `measure_list` for vectorized queries
 
-), defaults=(None, None, None))  # NOTE: `defaults` iterable is applied from back to front, i.e. just `beacon_config` and `thresholds_roc` and `num_age_groups` has a default
+), defaults=(None, None, None, None))  # NOTE: `defaults` iterable is applied from back to front, i.e. just the fields after `store_mob`/`model` have a default
 
 
 Plot = namedtuple('Plot', (
@@ -355,6 +358,10 @@ class Experiment(object):
             mob_settings_file=mob_settings_file,
             full_scale=full_scale,
             measure_list=measure_list,
+            # flat struct-of-arrays view of the scalar measure parameters;
+            # lets downstream code evaluate active windows/probabilities over
+            # time vectorized instead of dispatching into each measure object
+            measure_bundle=MeasureBundle.from_measure_list(measure_list),
             testing_params=testing_params,
             store_mob=store_mob,
 
@@ -396,37 +403,44 @@ class Experiment(object):
         if not os.path.exists(directory):
             os.makedirs(directory)
         
-        # run all simulations
-        for sim in self.sims:
-
-            with open(sim.mob_settings_file, 'rb') as fp:
-                mob_settings = pickle.load(fp)
-        
-            summary = launch_parallel_simulations(
-                mob_settings=sim.mob_settings_file,
-                distributions=sim.distributions,
-                random_repeats=sim.random_repeats,
-                cpu_count=self.cpu_count,
-                params=sim.model_params,
-                initial_seeds=sim.initial_seeds,
-                testing_params=sim.testing_params,
-                measure_list=sim.measure_list,
-                max_time=TO_HOURS * sim.sim_days,
-                home_loc=mob_settings['home_loc'],
-                num_people=len(mob_settings['home_loc']),
-                site_loc=mob_settings['site_loc'],
-                num_sites=len(mob_settings['site_loc']),
-                beacon_config=sim.beacon_config,
-                thresholds_roc=sim.thresholds_roc if sim.thresholds_roc is not None else [],  # convert to [] if None
-                store_mob=sim.store_mob,
-                store_measure_bernoullis=sim.store_mob,
-                verbose=False)
-
-            if self.condensed_summary is True:
-                self.save_condensed_summary(sim, summary)
-            else:
-                self.save_run(sim, summary)
-
-            if self.verbose:
-                print(f'[Finished Sim] {self.get_sim_path(sim)}')
+        # run all simulations on one persistent worker pool; workers cache the
+        # unpickled town data per mobility settings file, so consecutive sims
+        # of the same sweep reuse it instead of re-reading it per setting
+        executor = ProcessPoolExecutor(self.cpu_count)
+        try:
+            for sim in self.sims:
+
+                with open(sim.mob_settings_file, 'rb') as fp:
+                    mob_settings = pickle.load(fp)
+
+                summary = launch_parallel_simulations(
+                    mob_settings=sim.mob_settings_file,
+                    distributions=sim.distributions,
+                    random_repeats=sim.random_repeats,
+                    cpu_count=self.cpu_count,
+                    params=sim.model_params,
+                    initial_seeds=sim.initial_seeds,
+                    testing_params=sim.testing_params,
+                    measure_list=sim.measure_list,
+                    max_time=TO_HOURS * sim.sim_days,
+                    home_loc=mob_settings['home_loc'],
+                    num_people=len(mob_settings['home_loc']),
+                    site_loc=mob_settings['site_loc'],
+                    num_sites=len(mob_settings['site_loc']),
+                    beacon_config=sim.beacon_config,
+                    thresholds_roc=sim.thresholds_roc if sim.thresholds_roc is not None else [],  # convert to [] if None
+                    store_mob=sim.store_mob,
+                    store_measure_bernoullis=sim.store_mob,
+                    verbose=False,
+                    executor=executor)
+
+                if self.condensed_summary is True:
+                    self.save_condensed_summary(sim, summary)
+                else:
+                    self.save_run(sim, summary)
+
+                if self.verbose:
+                    print(f'[Finished Sim] {self.get_sim_path(sim)}')
+        finally:
+            executor.shutdown()
  
@@ -0,0 +1,82 @@
+'''
+Struct-of-arrays view of a measure list.
+
+The measure objects in `lib.measures` are queried per individual per
+simulation event, which costs a Python attribute lookup and a method dispatch
+per measure per query. For consumers that only need the scalar stay-home /
+compliance / isolation parameters over time (analysis code, and incrementally
+the simulation tick path), this module flattens a measure list into parallel
+NumPy arrays so whole batches of time points can be evaluated with vectorized
+operations instead of per-measure dispatch.
+'''
+
+import numpy as np
+from dataclasses import dataclass
+
+from lib.measures import MeasureList
+
+
+@dataclass
+class MeasureBundle:
+    """
+    Parallel arrays describing the scalar parameters of a set of measures.
+    Entry i of every array belongs to the same measure.
+
+    t_start, t_end : np.ndarray of float
+        Active time window per measure (in hours, same units as `t_window`)
+    p_stay_home : np.ndarray of float
+        Stay-home / isolation probability per measure (0.0 for measures
+        without one, e.g. compliance measures)
+    p_compliance : np.ndarray of float
+        Tracking-app compliance probability per measure (0.0 otherwise)
+    isolation_duration : np.ndarray of float
+        Smart tracing isolation duration per measure (0.0 otherwise)
+    """
+
+    t_start: np.ndarray
+    t_end: np.ndarray
+    p_stay_home: np.ndarray
+    p_compliance: np.ndarray
+    isolation_duration: np.ndarray
+
+    @classmethod
+    def from_measure_list(cls, measure_list):
+        """Flattens `measure_list` (a `MeasureList` or plain list of measures)
+        into one `MeasureBundle`. Only scalar-valued parameters are extracted;
+        list- or dict-valued parameters (e.g. per-age or per-site-type
+        probabilities) are recorded as 0.0.
+        """
+        if isinstance(measure_list, MeasureList):
+            measures = [m for interlap in measure_list.measure_dict.values()
+                        for _, _, m in interlap]
+        else:
+            measures = list(measure_list)
+
+        def scalar(m, attr):
+            v = getattr(m, attr, 0.0)
+            return v if isinstance(v, float) else 0.0
+
+        return cls(
+            t_start=np.array([m.t_window.left for m in measures], dtype=np.float64),
+            t_end=np.array([m.t_window.right for m in measures], dtype=np.float64),
+            p_stay_home=np.array(
+                [max(scalar(m, 'p_stay_home'), scalar(m, 'p_isolate')) for m in measures],
+                dtype=np.float64),
+            p_compliance=np.array(
+                [scalar(m, 'p_compliance') for m in measures], dtype=np.float64),
+            isolation_duration=np.array(
+                [scalar(m, 'smart_tracing_isolation_duration') for m in measures],
+                dtype=np.float64),
+        )
+
+    def active_mask(self, t):
+        """Boolean mask of the measures whose time window contains `t`"""
+        return (t >= self.t_start) & (t < self.t_end)
+
+    def max_p_stay_home(self, t):
+        """Largest stay-home probability active at time `t` (0.0 when none)"""
+        return float(np.where(self.active_mask(t), self.p_stay_home, 0.0).max(initial=0.0))
+
+    def max_p_compliance(self, t):
+        """Largest compliance probability active at time `t` (0.0 when none)"""
+        return float(np.where(self.active_mask(t), self.p_compliance, 0.0).max(initial=0.0))
@@ -10,6 +10,7 @@ import scipy.optimize
 import scipy as sp
 import os, math
 import pickle
+from functools import lru_cache
 import matplotlib.pyplot as plt
 from joblib import Parallel, delayed
 from pathos.multiprocessing import ProcessingPool as Pool
@@ -182,42 +183,73 @@ def pp_launch(r, kwargs, distributions, params, initial_counts, testing_params,
     return result
 
 
-def launch_parallel_simulations(mob_settings, distributions, random_repeats, cpu_count, params, 
+@lru_cache(maxsize=1)
+def _load_mob_settings(path):
+    '''
+    Loads the mobility settings at `path`; cached per process, so workers of a
+    persistent pool unpickle the town data (population/site arrays, contact
+    tables) once and reuse it across rollouts and sweep settings
+    '''
+    with open(path, 'rb') as fp:
+        return pickle.load(fp)
+
+
+def _pp_launch_by_path(r, mob_settings_path, beacon_config, distributions, params, initial_counts,
+                       testing_params, measure_list, max_time, thresholds_roc, store_mob,
+                       store_measure_bernoullis):
+    kwargs = dict(_load_mob_settings(mob_settings_path))
+
+    # test-time mobility simulator additions and modifications
+    kwargs['beacon_config'] = beacon_config
+
+    return pp_launch(r, kwargs, distributions, params, initial_counts, testing_params,
+                     measure_list, max_time, thresholds_roc, store_mob, store_measure_bernoullis)
+
+
+def launch_parallel_simulations(mob_settings, distributions, random_repeats, cpu_count, params,
     initial_seeds, testing_params, measure_list, max_time, num_people, num_sites, site_loc, home_loc,
     beacon_config=None, thresholds_roc=None, verbose=True, synthetic=False, summary_options=None,
-    store_mob=False, store_measure_bernoullis=False):
-
-    with open(mob_settings, 'rb') as fp:
-        kwargs = pickle.load(fp)
-
-        # test-time mobility simulator additions and modifications
-        kwargs['beacon_config'] = beacon_config
-
-    mob_setting_list = [copy.deepcopy(kwargs) for _ in range(random_repeats)]
-    distributions_list = [copy.deepcopy(distributions) for _ in range(random_repeats)]
-    measure_list_list = [copy.deepcopy(measure_list) for _ in range(random_repeats)]
-    params_list = [copy.deepcopy(params) for _ in range(random_repeats)]
-    initial_seeds_list = [copy.deepcopy(initial_seeds) for _ in range(random_repeats)]
-    testing_params_list = [copy.deepcopy(testing_params) for _ in range(random_repeats)]
-    thresholds_roc_list = [copy.deepcopy(thresholds_roc) for _ in range(random_repeats)]
-    max_time_list = [copy.deepcopy(max_time) for _ in range(random_repeats)]
-    store_mob_list = [copy.deepcopy(store_mob) for _ in range(random_repeats)]
-    store_measure_bernoullis_list = [copy.deepcopy(store_measure_bernoullis) for _ in range(random_repeats)]
+    store_mob=False, store_measure_bernoullis=False, executor=None):
+
+    # per-rollout arguments; the executor pickles each element on its way to a
+    # worker anyway, so no parent-side deepcopies are needed. The heavyweight
+    # mobility settings travel as a path and are unpickled (cached) per worker.
     repeat_ids = list(range(random_repeats))
+    mob_settings_list = [mob_settings] * random_repeats
+    beacon_config_list = [beacon_config] * random_repeats
+    distributions_list = [distributions] * random_repeats
+    measure_list_list = [measure_list] * random_repeats
+    params_list = [params] * random_repeats
+    initial_seeds_list = [initial_seeds] * random_repeats
+    testing_params_list = [testing_params] * random_repeats
+    thresholds_roc_list = [thresholds_roc] * random_repeats
+    max_time_list = [max_time] * random_repeats
+    store_mob_list = [store_mob] * random_repeats
+    store_measure_bernoullis_list = [store_measure_bernoullis] * random_repeats
 
     if verbose:
         print('Launching simulations...')
 
-    with ProcessPoolExecutor(cpu_count) as ex:
-        res = ex.map(pp_launch, repeat_ids, mob_setting_list, distributions_list, params_list,
-                     initial_seeds_list, testing_params_list, measure_list_list, max_time_list,
-                     thresholds_roc_list, store_mob_list, store_measure_bernoullis_list)
+    if executor is not None:
+        # persistent pool provided by the caller (e.g. `Experiment.run_all`);
+        # workers keep their cached town data alive across sweep settings
+        res = list(executor.map(_pp_launch_by_path, repeat_ids, mob_settings_list, beacon_config_list,
+                                distributions_list, params_list, initial_seeds_list,
+                                testing_params_list, measure_list_list, max_time_list,
+                                thresholds_roc_list, store_mob_list, store_measure_bernoullis_list))
+    else:
+        with ProcessPoolExecutor(cpu_count) as ex:
+            res = ex.map(_pp_launch_by_path, repeat_ids, mob_settings_list, beacon_config_list,
+                         distributions_list, params_list, initial_seeds_list,
+                         testing_params_list, measure_list_list, max_time_list,
+                         thresholds_roc_list, store_mob_list, store_measure_bernoullis_list)
 
     # # # DEBUG mode (to see errors printed properly)
     # res = []
     # for r in repeat_ids:
-    #     res.append(pp_launch(r, mob_setting_list[r], distributions_list[r], params_list[r],
-    #                  initial_seeds_list[r], testing_params_list[r], measure_list_list[r], 
+    #     res.append(_pp_launch_by_path(r, mob_settings_list[r], beacon_config_list[r],
+    #                  distributions_list[r], params_list[r],
+    #                  initial_seeds_list[r], testing_params_list[r], measure_list_list[r],
     #                  max_time_list[r], thresholds_roc_list[r], store_mob_list[r], store_measure_bernoullis_list[r]))
 
     
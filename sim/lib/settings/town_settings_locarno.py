@@ -28,6 +28,11 @@ population_per_age_group = np.array([30078,     # 0-9
                                      ], dtype=np.int32)
 
 region_population = population_per_age_group.sum()
+
+# Cumulative age distribution; lets downstream code draw an age group with a
+# single `np.searchsorted` per person instead of a categorical draw
+age_group_cdf = (np.cumsum(population_per_age_group) / region_population).astype(np.float64)
+
 town_population = 15824
 
 # Roughly 5k tests per day in Switzerland (rough average over time frame 10.03.-27.04.2020:
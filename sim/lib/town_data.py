@@ -135,8 +135,10 @@ def generate_population(bbox, population_per_age_group, density_file=None, tile_
     # discard tiles with zero population
     tiles = tiles[tiles['pop']!=0]
 
-    # probability of being in each age group
+    # probability of being in each age group, precumulated so every age-group
+    # draw below is a single searchsorted instead of a categorical sample
     age_proportions = np.divide(population_per_age_group, sum(population_per_age_group))
+    age_cdf = np.cumsum(age_proportions)
 
     # generate lists of individuals' home location and age group
     home_loc=[]
@@ -157,7 +159,7 @@ def generate_population(bbox, population_per_age_group, density_file=None, tile_
         # store the tile to which each home belongs
         home_tile+=pop*[i_tile]
         # age group assigned proportionally to the real statistics
-        people_age+=list(np.random.multinomial(n=1, pvals=age_proportions, size=pop).argmax(axis=1))
+        people_age+=list(np.searchsorted(age_cdf, np.random.random(pop), side='right'))
         i_tile+=1
 
     if household_info is not None: